@@ -1,4 +1,4 @@
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 import functools
 import inspect
 import logging
@@ -7,8 +7,6 @@ from pathlib import Path
 from traceback import format_exc
 from typing import Union, Optional
 
-import arrow
-
 from .timer import Timer
 from .slack import post as post_to_slack
 
@@ -30,8 +28,11 @@ def notify_error(subject: str, msg: str):
     post_to_slack(url, subject, msg)
 
 
+_DT_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+
 def log_notify(filename, status, info):
-    dt = arrow.utcnow().format('YYYY-MM-DD HH:mm:ss.SSSSSS') + ' UTC'
+    dt = datetime.now(timezone.utc).strftime(_DT_FORMAT) + ' UTC'
     info = info.replace('\n', ' ')
     open(filename, 'w').write(status + '\n' + dt + '\n' + info)
 
@@ -55,8 +56,8 @@ def should_send_alert(status: str, ff: Path, silent_seconds: Union[float, int],
     if old_info != info:
         return True
 
-    t0 = arrow.get(old_date + ' ' + old_time)
-    t1 = arrow.utcnow()
+    t0 = datetime.strptime(old_date + ' ' + old_time, _DT_FORMAT).replace(tzinfo=timezone.utc)
+    t1 = datetime.now(timezone.utc)
     lapse = (t1 - t0).total_seconds()
 
     if lapse < float(silent_seconds):
@@ -4,11 +4,18 @@ import asyncio
 import concurrent.futures
 import functools
 import logging
-import multiprocessing
+import os
 from typing import Callable, Awaitable
 
 logger = logging.getLogger(__name__)
 
+try:
+    # Number of CPUs this process is allowed to run on.
+    _N_CPUS = len(os.sched_getaffinity(0))
+except AttributeError:
+    # Not available on some platforms, e.g. macOS.
+    _N_CPUS = os.cpu_count() or 1
+
 
 async def async_call(
         func,
@@ -29,19 +36,40 @@ async def concurrent_gather(
     '''
     Limit the number of concurrently running
     async functions.
+
+    Only up to `max_workers` of `tasks` are scheduled at any time;
+    the next one is started when a running one finishes.
+    Results are returned in the order of `tasks`.
     '''
     if max_workers is None:
-        max_workers = multiprocessing.cpu_count()
-    semaphore = asyncio.Semaphore(max_workers)
-
-    async def sem_task(task):
-        async with semaphore:
-            return await task
-
-    return await asyncio.gather(
-        *(sem_task(task) for task in tasks),
-        return_exceptions=return_exceptions,
-    )
+        max_workers = _N_CPUS
+    results = [None] * len(tasks)
+    todo = iter(enumerate(tasks))
+    running = {}
+
+    try:
+        while True:
+            for i, task in todo:
+                running[asyncio.ensure_future(task)] = i
+                if len(running) >= max_workers:
+                    break
+            if not running:
+                return results
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                i = running.pop(t)
+                try:
+                    results[i] = t.result()
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    results[i] = e
+    finally:
+        for t in running:
+            t.cancel()
+        for _, task in todo:
+            if asyncio.iscoroutine(task):
+                task.close()  # avoid 'coroutine was never awaited' warnings
 
 
 class MaybeAwait:
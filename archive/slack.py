@@ -3,22 +3,132 @@ Use a 'bot' to post message to a Slack channel.
 This is useful for error alerts and scheduled notifications.
 '''
 
+import atexit
 import json
+import logging
+import queue
 import threading
+import time
 import urllib.request
+from collections import defaultdict
 
 import arrow
 
+logger = logging.getLogger(__name__)
+
 # Reference:
 # search for 'incoming webhooks for slack'
 
-def post(channel_webhook_url: str, subject: str, text: str) -> None:
-    dt = arrow.utcnow().to('US/Pacific').format('YYYY-MM-DD HH:mm:ss') + ' Pacific'
-    json_data = json.dumps({
-        'text': '--- {} ---\n{}\n{}'.format(subject, dt, text)
-        }).encode('ascii')
+# Messages that arrive within this many seconds of one another
+# are combined into a single post to the same channel...
+COALESCE_SECONDS = 0.1
+# ...but a batch is sent at most this long after its first message,
+# or once it holds this many messages, so that a steady stream of
+# messages does not hold them all back.
+MAX_BATCH_SECONDS = 1.0
+MAX_BATCH_MESSAGES = 20
+
+# Slack truncates a message longer than 40000 characters;
+# longer batches are split into several posts.
+MAX_POST_CHARS = 39000
+
+# A webhook that does not respond must not hold up later messages.
+SEND_TIMEOUT_SECONDS = 10
+
+# Upper bound on the time spent at exit sending pending messages.
+FLUSH_TIMEOUT_SECONDS = 30
+
+_SEPARATOR = '\n\n'
+
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+_STOP = object()
+
+
+def _send(channel_webhook_url: str, text: str) -> None:
+    json_data = json.dumps({'text': text}).encode('ascii')
     req = urllib.request.Request(
-        channel_webhook_url, data=json_data, 
+        channel_webhook_url, data=json_data,
         headers={'Content-type': 'application/json'})
-    thr = threading.Thread(target=urllib.request.urlopen, args=(req, ))
-    thr.start()
+    urllib.request.urlopen(req, timeout=SEND_TIMEOUT_SECONDS)
+
+
+def _split_posts(texts: list) -> list:
+    # Join `texts` into posts of at most `MAX_POST_CHARS` characters each.
+    posts = []
+    post = []
+    size = 0
+    for text in texts:
+        text = text[:MAX_POST_CHARS]
+        if post and size + len(_SEPARATOR) + len(text) > MAX_POST_CHARS:
+            posts.append(_SEPARATOR.join(post))
+            post = []
+            size = 0
+        size += len(text) + (len(_SEPARATOR) if post else 0)
+        post.append(text)
+    if post:
+        posts.append(_SEPARATOR.join(post))
+    return posts
+
+
+def _send_batch(batch: list) -> None:
+    pending = defaultdict(list)
+    for url, text in batch:
+        pending[url].append(text)
+    for url, texts in pending.items():
+        for text in _split_posts(texts):
+            try:
+                _send(url, text)
+            except Exception as e:
+                logger.exception(e)
+
+
+def _drain() -> None:
+    stop = False
+    while not stop:
+        item = _queue.get()
+        if item is _STOP:
+            return
+        batch = [item]
+        deadline = time.monotonic() + MAX_BATCH_SECONDS
+        while len(batch) < MAX_BATCH_MESSAGES:
+            timeout = min(COALESCE_SECONDS, deadline - time.monotonic())
+            if timeout <= 0:
+                break
+            try:
+                item = _queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stop = True
+                break
+            batch.append(item)
+        _send_batch(batch)
+
+
+def _flush() -> None:
+    # Runs at interpreter exit, so that messages posted right before
+    # exit (e.g. an error alert on the way out) are still sent.
+    _queue.put(_STOP)
+    _worker.join(FLUSH_TIMEOUT_SECONDS)
+
+
+def _ensure_worker() -> None:
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_drain, daemon=True)
+            _worker.start()
+            atexit.register(_flush)
+
+
+def post(channel_webhook_url: str, subject: str, text: str) -> None:
+    '''
+    Enqueue the message and return right away.
+    A background thread sends the messages, combining those that
+    arrive close together into one post per channel.
+    '''
+    dt = arrow.utcnow().to('US/Pacific').format('YYYY-MM-DD HH:mm:ss') + ' Pacific'
+    _ensure_worker()
+    _queue.put((channel_webhook_url, '--- {} ---\n{}\n{}'.format(subject, dt, text)))
@@ -1,15 +1,35 @@
+import base64
+import functools
+import io
 import json
+import logging
 import pkgutil
 import random
 import textwrap
 import time
-from typing import Iterable, Iterator
 
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 
 # Ideas are borrowed from the python package 'pylivy'.
 
+logger = logging.getLogger(__name__)
+
+
+# Code snippets are often submitted repeatedly, e.g. by `PySparkSession.read`.
+_dedent = functools.lru_cache(maxsize=256)(textwrap.dedent)
+
+_PARQUET_TMPL = (
+    'import base64 as _livy_client_base64\n'
+    '_livy_client_base64.b64encode({}.toPandas().to_parquet()).decode()'
+)
+
+_COLLECT_TMPL = (
+    'for _livy_client_serialised_row in {}.toJSON().collect():\n'
+    '    print(_livy_client_serialised_row)'
+)
+
 
 class SparkSessionError(Exception):
     def __init__(self, name, value, traceback, kind) -> None:
@@ -42,27 +62,17 @@ def unquote(s: str) -> str:
     return s[1:][:-1]  # remove the quotes in the string value
 
 
-def polling_intervals(start: Iterable[float],
-                      rest: float,
-                      max_duration: float = None) -> Iterator[float]:
-    def _intervals():
-        yield from start
-        while True:
-            yield rest
-
-    cumulative = 0.0
-    for interval in _intervals():
-        cumulative += interval
-        if max_duration is not None and cumulative > max_duration:
-            break
-        yield interval
-
-
 class JsonClient:
     def __init__(self, url: str) -> None:
         self.url = url
+        self._base_url = url.rstrip('/')
         self.session = requests.Session()
         self.session.headers.update({'X-Requested-By': 'ambari'})
+        # All requests go to one Livy host; keep a few connections alive
+        # so that the polling in `SparkSession._wait` reuses them.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
     def close(self) -> None:
         self.session.close()
@@ -77,7 +87,7 @@ class JsonClient:
         return self._request('DELETE', endpoint)
 
     def _request(self, method: str, endpoint: str, data: dict = None) -> dict:
-        url = self.url.rstrip('/') + endpoint
+        url = self._base_url + endpoint
         response = self.session.request(method, url, json=data)
         response.raise_for_status()
         return response.json()
@@ -101,12 +111,18 @@ class SparkSession:
         self._start()
 
     def _wait(self, endpoint: str, wait_for_state: str):
-        intervals = polling_intervals([0.1, 0.2, 0.3, 0.5], 1.0)
+        # Exponential backoff with jitter. A session that is still
+        # 'starting' typically takes a long while, so it is polled less
+        # eagerly than a statement that is 'running'.
+        delay = 0.05
         while True:
             rr = self._client.get(endpoint)
-            if rr['state'] == wait_for_state:
+            state = rr['state']
+            if state == wait_for_state:
                 return rr
-            time.sleep(next(intervals))
+            ceiling = 5.0 if state == 'starting' else 1.0
+            delay = min(delay * 1.5, ceiling)
+            time.sleep(delay * random.uniform(0.8, 1.2))
 
     def _start(self):
         r = self._client.post('/sessions', data={'kind': self._kind})
@@ -115,7 +131,7 @@ class SparkSession:
         self._wait('/sessions/{}'.format(session_id), 'idle')
 
     def run(self, code: str) -> str:
-        data = {'code': textwrap.dedent(code)}
+        data = {'code': _dedent(code)}
         r = self._client.post(
             '/sessions/{}/statements'.format(self._session_id), data=data)
         statement_id = r['id']
@@ -146,6 +162,9 @@ class PySparkSession(SparkSession):
     def __init__(self, livy_server_url):
         super().__init__(livy_server_url, kind='pyspark')
         self._tmp_var_name = '_tmp_' + str(random.randint(100, 100000))
+        # Set to `False` once the Parquet transfer in `read` has failed,
+        # so that it is not attempted (and the frame collected) again.
+        self._parquet_ok = True
         self.run('import pyspark; import json')
 
     def run_module(self, module_name: str) -> None:
@@ -221,10 +240,21 @@ class PySparkSession(SparkSession):
             return unquote(z)
 
         if z_type == 'DataFrame':
-            code = """\
-                for _livy_client_serialised_row in {}.toJSON().collect():
-                    print(_livy_client_serialised_row)""".format(
-                self._tmp_var_name)
+            # Transfer the frame as base64-encoded Parquet, which is columnar
+            # and typed. This requires `pyarrow` on both ends; if that fails,
+            # fall back to collecting one JSON string per row.
+            if self._parquet_ok:
+                code = _PARQUET_TMPL.format(self._tmp_var_name)
+                try:
+                    output = unquote(self.run(code))
+                    return pd.read_parquet(io.BytesIO(base64.b64decode(output)))
+                except Exception as e:
+                    logger.warning(
+                        'failed to fetch DataFrame as Parquet, '
+                        'falling back to JSON for this session: %r', e)
+                    self._parquet_ok = False
+
+            code = _COLLECT_TMPL.format(self._tmp_var_name)
             output = self.run(code)
 
             rows = []
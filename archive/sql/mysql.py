@@ -1,13 +1,17 @@
 import logging
+import queue
+import threading
 import time
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from itertools import islice
 from pprint import pprint
-from typing import List, Iterable, ContextManager
+from typing import List, Iterable, Iterator, Tuple, Type, ContextManager
 
 import aioodbc
 import MySQLdb as mysqlclient
-from boltons.iterutils import chunked_iter
+import MySQLdb.cursors
 
 from .sql import SQLClient, Connection, AsyncConnection
 from ..mp import MAX_THREADS
@@ -21,7 +25,7 @@ class MysqlConnection(Connection):
         return [v[0] for v in z]
 
     def describe_table(self, tb_name: str) -> None:
-        z = self.read(f'DESCRIBE {tb_name}').fetchall_pandas()
+        z = self.read_pandas(f'DESCRIBE {tb_name}')
         pprint(z)
 
     def table_rowcount(self, tb_name: str, exact: bool = True) -> int:
@@ -32,34 +36,94 @@ class MysqlConnection(Connection):
         z = self.read(sql).fetchall()
         return int(z[0][0])
 
+    def read_iter(self, sql: str, *args, batch_size: int = 1000, **kwargs) -> Iterator[Tuple]:
+        """
+        Iterate over the rows of a query using a server-side cursor,
+        so that the full result set is never held in memory.
+
+        This uses a cursor of its own, hence the result of an earlier
+        ``read`` is left in place. However, the connection can not run
+        any other query (MySQL reports "Commands out of sync") until the
+        iterator is exhausted or closed, e.g. by ``close()`` on the
+        returned generator.
+        """
+        cursor = self._conn.cursor(MySQLdb.cursors.SSCursor)
+        try:
+            cursor.execute(sql, *args, **kwargs)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
     def insert_batch(self,
                      rows: Iterable[Iterable[str]],
                      *,
                      tb_name: str,
-                     cols: List[str]) -> int:
+                     cols: List[str],
+                     multirow: bool = True,
+                     max_statement_bytes: int = 1_000_000) -> int:
+        """
+        If ``multirow`` is ``True``, rows are sent in as few
+        ``INSERT ... VALUES (...), (...), ...`` statements as allowed by
+        ``max_statement_bytes`` (a rough estimate of the statement size,
+        which should stay well below the server's ``max_allowed_packet``).
+        Otherwise, ``cursor.executemany`` is used.
+
+        The returned count may not be the number of rows inserted;
+        its meaning depends on the MySQL client package.
+        """
         if hasattr(rows, '__len__'):
             assert len(rows) <= 10000
 
+        # The cursor is used directly, bypassing `_execute_`.
+        self._headers = None
         columns_str = ", ".join(cols)
         symbol = "%s"
         val_place_holders = ", ".join([symbol] * (len(cols)))
+        sql = f"INSERT INTO {tb_name} ({columns_str}) VALUES "
 
         try:
-            self._cursor.executemany(
-                f"INSERT INTO {tb_name} ({columns_str}) VALUES ({val_place_holders})",
-                rows,
-            )
+            if not multirow:
+                self._cursor.executemany(sql + f"({val_place_holders})", rows)
+                return self._cursor.rowcount
+
+            group = f"({val_place_holders})"
+            n = 0
+            chunk = []
+            nbytes = 0
+            for row in rows:
+                row = tuple(row)
+                # String values are sent quoted, hence the extra 2 bytes.
+                row_bytes = len(group) + sum(
+                    len(str(v)) + 2 if isinstance(v, str) else len(str(v))
+                    for v in row)
+                if chunk and nbytes + row_bytes > max_statement_bytes:
+                    self._cursor.execute(
+                        sql + ", ".join([group] * len(chunk)),
+                        [v for r in chunk for v in r],
+                    )
+                    n += self._cursor.rowcount
+                    chunk = []
+                    nbytes = 0
+                chunk.append(row)
+                nbytes += row_bytes
+            if chunk:
+                self._cursor.execute(
+                    sql + ", ".join([group] * len(chunk)),
+                    [v for r in chunk for v in r],
+                )
+                n += self._cursor.rowcount
+            return n
         except Exception as e:
             logger.exception(e)
             print('data rows:')
-            for row in rows:
+            for row in rows:  # This may be useless if `rows` is not a list.
                 print(row)
             raise
 
-        return self._cursor.rowcount
-        # This may not be the number of rows inserted.
-        # The meaning depends on the MySQL client package.
-
 
 class MysqlConnectionPool:
     def __init__(self,
@@ -68,36 +132,33 @@ class MysqlConnectionPool:
                  ):
         self._mysql_obj = mysql_obj
         self._maxsize = maxsize or MAX_THREADS
-        self._pool = []
-        self.size = 0  # number of active connections
-
-    @property
-    def vacancy(self) -> int:
-        # Number of currently usable connections.
-        # Value is 0 to self._maxsize, inclusive.
-        return self._maxsize - self.size + len(self._pool)
+        # Admission control: at most `_maxsize` connections are in use at a time.
+        self._slots = threading.BoundedSemaphore(self._maxsize)
+        self._pool = queue.LifoQueue()  # idle (conn, cursor) pairs
 
     @contextmanager
     def get_connection(self) -> ContextManager[MysqlConnection]:
-        if self.size < self._maxsize:
-            if self._pool:
-                conn = self._pool.pop()
-            else:
+        self._slots.acquire()
+        try:
+            try:
+                conn, cursor = self._pool.get_nowait()
+            except queue.Empty:
+                # Connections are created lazily, only when no idle one is available.
                 conn = self._mysql_obj.connect()
                 cursor = conn.cursor()
-                self.size += 1
-        else:
-            while not self._pool:
-                time.sleep(0.07)
-            conn, cursor = self._pool.pop()
-
-        try:
-            yield self._mysql_obj.CONNECTION_CLASS(conn, cursor)
+            try:
+                yield self._mysql_obj.CONNECTION_CLASS(conn, cursor)
+            finally:
+                self._pool.put((conn, cursor))
         finally:
-            self._pool.append((conn, cursor))
+            self._slots.release()
 
     def close(self) -> None:
-        for conn, cursor in self._pool:
+        while True:
+            try:
+                conn, cursor = self._pool.get_nowait()
+            except queue.Empty:
+                break
             cursor.close()
             conn.close()
 
@@ -108,20 +169,26 @@ class MysqlConnectionPool:
                       cols: List[str],
                       batch_size: int,
                       log_every_n_batches: int = 1,
+                      adaptive: bool = False,
                       ) -> int:
+        '''
+        If `adaptive` is `True`, `batch_size` is only the starting size;
+        it is grown while batches take under 50 ms to insert and halved
+        when one takes over 500 ms, staying within 1 to 10000 rows.
+        '''
         assert batch_size <= 10000
-        futures = {}
-        n_inserted = 0
 
-        def callback(t):
-            if t.cancelled():
-                raise RuntimeError('Future object has been cancelled')
-            e = t.exception()
-            if e is not None:
-                raise e
-            del futures[id(t)]
+        def batches():
+            it = iter(rows)
+            while True:
+                batch = list(islice(it, batch_size))
+                if not batch:
+                    break
+                yield batch
 
         def insert_one_batch(data, ibatch):
+            nonlocal batch_size
+            t0 = time.perf_counter()
             if log_every_n_batches and (ibatch + 1) % log_every_n_batches == 0:
                 verbose = True
                 logger.info('  inserting batch #%d', ibatch + 1)
@@ -131,19 +198,26 @@ class MysqlConnectionPool:
                 n = conn.insert_batch(data, tb_name=tb_name, cols=cols)
             if verbose:
                 logger.info('  inserted batch #%d', ibatch + 1)
-            nonlocal n_inserted
-            n_inserted += n
-
-        with ThreadPoolExecutor(self._maxsize + 1) as executor:
-            for ibatch, batch in enumerate(chunked_iter(rows, batch_size)):
-                while not self.vacancy:
-                    time.sleep(0.017)
-                t = executor.submit(insert_one_batch, batch, ibatch)
-                futures[id(t)] = t
-                t.add_done_callback(callback)
-
-        while futures:
-            time.sleep(0.012)
+            if adaptive:
+                lapse = time.perf_counter() - t0
+                if lapse < 0.05:
+                    batch_size = min(int(batch_size * 1.5) + 1, 10000)
+                elif lapse > 0.5:
+                    batch_size = max(batch_size // 2, 1)
+            return n
+
+        # Keep at most `_maxsize` batches in flight; collect the oldest
+        # before reading ahead, so that memory stays bounded and
+        # a failure is raised early.
+        pending = deque()
+        n_inserted = 0
+        with ThreadPoolExecutor(self._maxsize) as executor:
+            for ibatch, batch in enumerate(batches()):
+                if len(pending) >= self._maxsize:
+                    n_inserted += pending.popleft().result()
+                pending.append(executor.submit(insert_one_batch, batch, ibatch))
+            while pending:
+                n_inserted += pending.popleft().result()
         return n_inserted
 
 
@@ -167,11 +241,11 @@ class MysqlAsyncConnection(AsyncConnection):
         z = await self.fetchall()
         return int(z[0][0])
 
-    def insert_batch(self,
-                     rows: Iterable[Iterable[str]],
-                     *,
-                     tb_name: str,
-                     cols: List[str]) -> int:
+    async def insert_batch(self,
+                           rows: Iterable[Iterable[str]],
+                           *,
+                           tb_name: str,
+                           cols: List[str]) -> int:
         # We do not enforce `rows` tobe a Sequence.
         # But, don't make it too long.
         if hasattr(rows, '__len__'):
@@ -209,13 +283,20 @@ class MySQL(SQLClient):
                  host: str,       # MySQL server url
                  port: int = 3306,
                  autocommit: bool = True,
+                 cursorclass: Type[MySQLdb.cursors.BaseCursor] = MySQLdb.cursors.Cursor,
                  ):
+        '''
+        `cursorclass` is the default cursor class of the connections.
+        Pass `MySQLdb.cursors.SSCursor` to stream results from the server
+        instead of buffering full result sets on the client.
+        '''
         self.user = user
         self.password = password
         self.database = database
         self.host = host
         self.port = port
         self.autocommit = autocommit
+        self.cursorclass = cursorclass
 
     def connect(self):
         conn = mysqlclient.connect(
@@ -224,6 +305,7 @@ class MySQL(SQLClient):
             user=self.user,
             passwd=self.password,
             db=self.database,
+            cursorclass=self.cursorclass,
         )
         conn.autocommit(self.autocommit)
         return conn
@@ -1,14 +1,122 @@
+import io
 import logging
-from typing import List, Tuple
+from collections import OrderedDict
+from itertools import islice
+from typing import Iterable, List, Sequence, Tuple
 
+import pandas as pd
 import psycopg2
+import psycopg2.extras
 
 from .sql import SQLClient, Connection
 
 logger = logging.getLogger(__name__)
 
 
+# Catalog queries take the table name as a bound parameter.
+_HAS_TABLE_SQL = "SELECT exists(SELECT relname FROM pg_class WHERE relname = %s)"
+
+_TABLE_SCHEMA_SQL = """
+SELECT column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_name = %s
+"""
+
+_TABLE_COLUMNS_SQL = "SELECT column_name from information_schema.columns WHERE table_name = %s"
+
+
+def _format_value_for_copy(value) -> str:
+    # Text format of `COPY`; see
+    # https://www.postgresql.org/docs/current/sql-copy.html
+    # Scalars are rendered to match psycopg2's adaptation in the
+    # `execute_values` path of `insert_batch`, so that a row is stored
+    # the same either way. Containers are rejected.
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        # `bytea` hex format; the backslash itself is escaped for `COPY`.
+        return '\\\\x' + bytes(value).hex()
+    if isinstance(value, (list, tuple, set, frozenset, dict)):
+        raise TypeError(
+            f"value of type '{type(value).__name__}' is not supported by COPY; "
+            "convert it to a string (e.g. a JSON or array literal) first")
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r'))
+
+
+def _to_pg_placeholders(sql: str) -> str:
+    # Replace the `%s` placeholders by `$1`, `$2`, ... for `PREPARE`.
+    # `PREPARE` is run without args, hence psycopg2 does not interpret
+    # `sql`; reject what a plain text replacement would get wrong.
+    if '%%' in sql:
+        raise ValueError("'%%' is not supported in prepared statements")
+    parts = sql.split('%s')
+    quoted = False
+    for part in parts[:-1]:
+        if part.count("'") % 2:
+            quoted = not quoted
+        if quoted:
+            raise ValueError(
+                "'%s' inside a string literal is not supported in prepared statements")
+    return parts[0] + ''.join(f'${i}{p}' for i, p in enumerate(parts[1:], 1))
+
+
 class PgConnection(Connection):
+    # Prepared statements kept per connection; the least recently used
+    # one is deallocated beyond this number.
+    MAX_PREPARED = 100
+
+    def __init__(self, conn, cursor):
+        super().__init__(conn, cursor)
+        self._prepared = OrderedDict()  # SQL -> name of the prepared statement
+        self._n_prepared = 0
+
+    def prepare(self, sql: str) -> str:
+        '''
+        Create a server-side prepared statement for `sql` once per connection,
+        so that repeated execution skips parsing and planning.
+
+        Only positional `%s` placeholders are supported. Because `sql` is
+        not passed through psycopg2's parameter handling, `%%` and `%s`
+        inside string literals are not supported and raise `ValueError`.
+
+        Up to `MAX_PREPARED` statements are kept; beyond that the least
+        recently used one is deallocated.
+
+        Returns the name of the prepared statement.
+        '''
+        name = self._prepared.get(sql)
+        if name is not None:
+            self._prepared.move_to_end(sql)
+            return name
+
+        pg_sql = _to_pg_placeholders(sql)
+        self._n_prepared += 1
+        name = f'_zpz_stmt_{self._n_prepared}'
+        self._execute(f'PREPARE {name} AS {pg_sql}')
+        self._prepared[sql] = name
+        if len(self._prepared) > self.MAX_PREPARED:
+            _, evicted = self._prepared.popitem(last=False)
+            self._execute(f'DEALLOCATE {evicted}')
+        return name
+
+    def read_prepared(self, sql: str, args: Sequence = ()) -> 'PgConnection':
+        '''
+        Like `read`, but runs `sql` as a prepared statement (see `prepare`).
+        '''
+        name = self.prepare(sql)
+        if args:
+            place_holders = ', '.join(['%s'] * len(args))
+            self._execute(f'EXECUTE {name} ({place_holders})', args)
+        else:
+            self._execute(f'EXECUTE {name}')
+        return self
+
     def get_databases(self) -> List[str]:
         sql = "SELECT datname FROM pg_database WHERE datistemplate = false"
         headers, rows = self.read(sql).fetchall()
@@ -23,9 +131,7 @@ class PgConnection(Connection):
         # A 'lazy' solution
         # return tb_name in self.get_tables()
 
-        sql = "SELECT exists(SELECT relname FROM pg_class WHERE relname = '{}')".format(
-            tb_name)
-        return self.read(sql).fetchall()
+        return self.read(_HAS_TABLE_SQL, (tb_name,)).fetchall()
 
     def get_table_schema(
             self, tb_name: str) -> Tuple[List[str], List[Tuple[str, str, str]]]:
@@ -34,19 +140,102 @@ class PgConnection(Connection):
             ['column_name', 'data_type', 'is_nullable'],
             [[column_name, data_type, is_nullable] for each field]
         '''
-        sql = """
-        SELECT column_name, data_type, is_nullable
-        FROM information_schema.columns
-        WHERE table_name = '{tb_name}'
-        """.format(tb_name=tb_name)
-        return self.read(sql).fetchall()
+        return self.read(_TABLE_SCHEMA_SQL, (tb_name,)).fetchall()
 
     def get_table_columns(self, tb_name: str) -> List[str]:
-        sql = "SELECT column_name from information_schema.columns WHERE table_name = '{}'".format(
-            tb_name)
-        rows = self.read(sql).fetchall()
+        rows = self.read(_TABLE_COLUMNS_SQL, (tb_name,)).fetchall()
         return [v[0] for v in rows]
 
+    def table_rowcount(self, tb_name: str, exact: bool = True) -> int:
+        '''
+        If `exact` is `False`, return the planner's estimate from the catalog,
+        which is instant, instead of counting the rows.
+        '''
+        if exact:
+            sql = f"SELECT COUNT(*) FROM {tb_name}"
+            z = self.read(sql).fetchall()
+        else:
+            sql = "SELECT reltuples::bigint FROM pg_class WHERE relname = %s"
+            z = self.read(sql, (tb_name,)).fetchall()
+        return int(z[0][0])
+
+    def copy_select(self, sql: str, file) -> None:
+        '''
+        Run the query `sql` by `COPY ... TO STDOUT` and write the result,
+        in CSV format with a header line, into the file-like object `file`.
+
+        This is much faster than `read` followed by `fetchall`
+        for large results.
+        '''
+        # The cursor is used directly, bypassing `_execute_`.
+        self._headers = None
+        self._cursor.copy_expert(
+            f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER true)", file)
+
+    def copy_select_pandas(self, sql: str) -> pd.DataFrame:
+        buf = io.StringIO()
+        self.copy_select(sql, buf)
+        buf.seek(0)
+        return pd.read_csv(buf)
+
+    def insert_batch(self,
+                     rows: Iterable[Iterable],
+                     *,
+                     tb_name: str,
+                     cols: List[str],
+                     on_conflict: str = None,
+                     page_size: int = 1000) -> int:
+        '''
+        Insert rows by a single `COPY ... FROM STDIN`, which avoids
+        the per-row round trip of `executemany`.
+
+        `COPY` can not express conflict handling. If `on_conflict` is given,
+        e.g. 'ON CONFLICT (id) DO NOTHING', the rows are sent by
+        `psycopg2.extras.execute_values` as multi-row `INSERT` statements
+        of up to `page_size` rows each.
+
+        Values must be scalars (including `bytes`, sent as `bytea`);
+        lists, tuples and dicts raise `TypeError`.
+        '''
+        # The cursor is used directly, bypassing `_execute_`.
+        self._headers = None
+        columns_str = ', '.join(cols)
+
+        if on_conflict:
+            sql = f"INSERT INTO {tb_name} ({columns_str}) VALUES %s {on_conflict}"
+            # `execute_values` runs one statement per page, after which
+            # `rowcount` covers only the last page; hence page the rows
+            # here and add up the counts.
+            rows = iter(rows)
+            n = 0
+            try:
+                while True:
+                    page = list(islice(rows, page_size))
+                    if not page:
+                        break
+                    psycopg2.extras.execute_values(
+                        self._cursor, sql, page, page_size=len(page))
+                    n += self._cursor.rowcount
+            except Exception as e:
+                logger.exception(e)
+                raise
+            return n
+
+        buf = io.StringIO()
+        for row in rows:
+            buf.write('\t'.join(_format_value_for_copy(v) for v in row))
+            buf.write('\n')
+        buf.seek(0)
+
+        sql = f"COPY {tb_name} ({columns_str}) FROM STDIN WITH (FORMAT text)"
+        try:
+            self._cursor.copy_expert(sql, buf)
+        except Exception as e:
+            logger.exception(e)
+            raise
+
+        return self._cursor.rowcount
+
 
 class Postgres(SQLClient):
     CONNECTION_CLASS = PgConnection
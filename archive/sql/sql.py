@@ -18,6 +18,7 @@ class Connection:
     def __init__(self, conn, cursor):
         self._conn = conn
         self._cursor = cursor
+        self._headers = None
         if isinstance(conn, MySQLdb.connections.Connection):
             self._autocommit = conn.get_autocommit()
         else:
@@ -34,6 +35,7 @@ class Connection:
     def _execute_(self, sql, *args, **kwargs) -> None:
         logger.debug('executing SQL statement\n%s\nargs:\n%s\nkwargs:\n%s',
                      sql, str(args), str(kwargs))
+        self._headers = None
         self._cursor.execute(sql, *args, **kwargs)
 
     def _execute(self, sql: str, *args, **kwargs) -> None:
@@ -58,6 +60,9 @@ class Connection:
     def iterbatches(self, batch_size: int) -> Iterator[List[Tuple]]:
         """
         This method is called after ``read`` to iter over results, one batch at a time.
+
+        For results too large to be held on the client, use a server-side cursor,
+        e.g. ``MysqlConnection.read_iter``.
         """
         while True:
             rows = self.fetchmany(batch_size)
@@ -74,7 +79,9 @@ class Connection:
         This can be used to augment the returns of `fetchone`, `fetchmany`, `fetchall`,
         which return values only, i.e. they do not return column headers.
         """
-        return [x[0] for x in self._cursor.description]
+        if self._headers is None:
+            self._headers = [x[0] for x in self._cursor.description]
+        return self._headers
 
     def fetchone(self) -> Union[Tuple, None]:
         """
@@ -126,10 +133,42 @@ class Connection:
 
         Warning: do not use this if the result contains a large number of rows.
         """
-        rows = self.fetchall()
-        if not rows:
-            return pd.DataFrame(columns=self.headers)
-        return pd.DataFrame.from_records(list(rows), columns=self.headers)
+        # `from_records` handles an empty result as well.
+        return pd.DataFrame.from_records(iter(self._cursor), columns=self.headers)
+
+    def read_pandas(self, sql: str, params=None, chunksize: int = None
+                    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+        """
+        Run a query and load the result into a ``pandas.DataFrame``.
+
+        If ``chunksize`` is given, return an iterator of ``DataFrame`` objects
+        of up to that many rows each.
+
+        This uses a cursor of its own, hence does not affect ``read``
+        and the ``fetch*`` methods.
+        """
+        if chunksize is not None:
+            return self._iter_pandas(sql, params, chunksize)
+        cursor = self._conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            columns = [d[0] for d in cursor.description]
+            return pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
+        finally:
+            cursor.close()
+
+    def _iter_pandas(self, sql: str, params, chunksize: int) -> Iterator[pd.DataFrame]:
+        cursor = self._conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            columns = [d[0] for d in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                yield pd.DataFrame.from_records(rows, columns=columns)
+        finally:
+            cursor.close()
 
     def write(self, sql: str, *args, **kwargs) -> None:
         self._execute(sql, *args, **kwargs)
@@ -141,6 +180,7 @@ class AsyncConnection:
                  cursor: aioodbc.cursor.Cursor):
         self._conn = conn
         self._cursor = cursor
+        self._headers = None
         self._autocommit = conn.autocommit
 
     async def commit(self) -> None:
@@ -154,6 +194,7 @@ class AsyncConnection:
     async def _execute_(self, sql, *args, **kwargs):
         logger.debug('executing SQL statement:\n%s\nargs:\n%s\nkwargs:\n%s',
                      sql, args, kwargs)
+        self._headers = None
         await self._cursor.execute(sql, *args, **kwargs)
 
     async def _execute(self, sql: str, *args, **kwargs) -> None:
@@ -181,7 +222,9 @@ class AsyncConnection:
 
     @property
     def headers(self) -> List[str]:
-        return [x[0] for x in self._cursor.description]
+        if self._headers is None:
+            self._headers = [x[0] for x in self._cursor.description]
+        return self._headers
 
     async def fetchone(self) -> Union[Tuple, None]:
         return await self._cursor.fetchone()
@@ -208,7 +251,7 @@ class AsyncConnection:
         rows = await self.fetchall()
         if not rows:
             return pd.DataFrame(columns=self.headers)
-        return pd.DataFrame.from_records(list(rows), columns=self.headers)
+        return pd.DataFrame.from_records(rows, columns=self.headers)
 
     async def write(self, sql: str, *args, **kwargs) -> None:
         await self._execute(sql, *args, **kwargs)
@@ -0,0 +1,45 @@
+from zpz.sql.mysql import MysqlConnection
+
+
+class FakeConn:
+    autocommit = True
+
+
+class FakeCursor:
+    def __init__(self):
+        self.statements = []
+        self.rowcount = 0
+
+    def execute(self, sql, args=None):
+        self.statements.append((sql, args))
+        self.rowcount = sql.count('(%s, %s)')
+
+
+def test_insert_batch_chunking():
+    cursor = FakeCursor()
+    conn = MysqlConnection(FakeConn(), cursor)
+    rows = [(i, 'x' * 10) for i in range(100)]
+    n = conn.insert_batch(rows, tb_name='t', cols=['a', 'b'], max_statement_bytes=250)
+    assert n == 100
+    assert len(cursor.statements) > 1
+
+    inserted = []
+    for sql, args in cursor.statements:
+        assert sql.startswith('INSERT INTO t (a, b) VALUES ')
+        assert len(args) == 2 * sql.count('(%s, %s)')
+        pairs = list(zip(args[::2], args[1::2]))
+        # Estimated size: placeholders, plus each value, plus quotes of strings.
+        nbytes = sum(len('(%s, %s)') + len(str(a)) + len(b) + 2 for a, b in pairs)
+        assert nbytes <= 250
+        inserted.extend(pairs)
+    assert inserted == rows
+
+
+def test_insert_batch_oversized_row():
+    # A row larger than the limit is still sent, in a statement of its own.
+    cursor = FakeCursor()
+    conn = MysqlConnection(FakeConn(), cursor)
+    rows = [(1, 'x' * 1000), (2, 'y')]
+    n = conn.insert_batch(rows, tb_name='t', cols=['a', 'b'], max_statement_bytes=100)
+    assert n == 2
+    assert len(cursor.statements) == 2
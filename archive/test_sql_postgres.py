@@ -0,0 +1,19 @@
+import pytest
+
+from zpz.sql.postgres import _format_value_for_copy
+
+
+def test_format_value_for_copy():
+    assert _format_value_for_copy(None) == '\\N'
+    assert _format_value_for_copy('a\tb') == 'a\\tb'
+    assert _format_value_for_copy('a\nb\rc') == 'a\\nb\\rc'
+    assert _format_value_for_copy('a\\b') == 'a\\\\b'
+    assert _format_value_for_copy(b'\x00\xff') == '\\\\x00ff'
+    assert _format_value_for_copy(True) == 'true'
+    assert _format_value_for_copy(False) == 'false'
+    assert _format_value_for_copy(3) == '3'
+    assert _format_value_for_copy(2.5) == '2.5'
+
+    for v in ([1, 2], (1, 2), {'a': 1}):
+        with pytest.raises(TypeError):
+            _format_value_for_copy(v)
@@ -1,2 +1,2 @@
 """Python utilities."""
-__version__ = "0.5.1"
+__version__ = "0.6"
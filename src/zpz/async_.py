@@ -11,6 +11,26 @@ async def async_call(
 ):
     loop = asyncio.get_running_loop()
     if kwargs:
-        func = functools.partial(func, **kwargs)
-
+        # `run_in_executor` does not take keyword arguments.
+        # Bind everything in the one `partial` we have to create anyway.
+        return await loop.run_in_executor(
+            executor, functools.partial(func, *args, **kwargs)
+        )
     return await loop.run_in_executor(executor, func, *args)
+
+
+def use_uvloop() -> bool:
+    """
+    Make ``uvloop`` the event loop of subsequent ``asyncio.run`` calls,
+    if the package is installed.
+    Call this once in a launching script, not in library modules.
+
+    Returns ``True`` if ``uvloop`` is in use, ``False`` otherwise.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        logger.info("`uvloop` is not installed; using the default event loop")
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
@@ -1,8 +1,11 @@
+import collections
+import concurrent.futures
+import functools
 import io
 import json
 import warnings
 import zlib
-from typing import Union
+from typing import Callable, Deque, Tuple, Union
 
 import avro.datafile
 import avro.io
@@ -11,8 +14,38 @@ import numpy
 
 warnings.filterwarnings("ignore", category=DeprecationWarning, module="avro")
 
+try:
+    # Drop-in replacement of `zlib` backed by Intel's ISA-L,
+    # which decompresses considerably faster.
+    from isal import isal_zlib as _zlib
+except ImportError:
+    _zlib = zlib
+
+try:
+    import orjson
+
+    def _json_dumps(x) -> str:
+        return orjson.dumps(x).decode("utf-8")
+
+except ImportError:
+    # Same output as `orjson`, so that the schema string does not
+    # depend on whether `orjson` is installed.
+    _json_dumps = functools.partial(json.dumps, separators=(",", ":"), ensure_ascii=False)
+
 
 class BinaryEncoder(avro.io.BinaryEncoder):
+    def __init__(self, writer):
+        super().__init__(writer)
+        # Bind once; every encoded value ends in a call to this.
+        self._write = writer.write
+
+    def write(self, datum):
+        # Same as the superclass minus the type assertion.
+        self._write(datum)
+
+    def WriteByte(self, byte):
+        self._write(bytes((byte,)))
+
     def write_float(self, datum):
         # A `numpy.float32` will call this function and be stored as
         # 4-byte `float` of `C`.
@@ -37,21 +70,42 @@ class BinaryEncoder(avro.io.BinaryEncoder):
         assert (
             type(datum) is int or type(datum) is numpy.int32
         )  # pylint: disable=unidiomatic-typecheck
-        assert -2147483648 < datum < 2147483647
-        datum = (datum << 1) ^ (datum >> 31)
-        while (datum & ~0x7F) != 0:
-            self.WriteByte((datum & 0x7F) | 0x80)
-            datum >>= 7
-        self.WriteByte(datum)
+        assert -2147483648 <= datum <= 2147483647
+        # Convert to Python `int` so that the shift below
+        # does not overflow for `numpy.int32`.
+        n = int(datum)
+        n = (n << 1) ^ (n >> 31)
+        if n < 0x80:
+            self._write(bytes((n,)))
+        else:
+            self._write(_VARINT_ENCODERS[(n.bit_length() + 6) // 7](n))
+
+    def write_long(self, datum):
+        # Same as the superclass, except that the bytes are
+        # computed without a loop and written in one call.
+        n = int(datum)
+        n = (n << 1) ^ (n >> 63)
+        if n < 0x80:
+            self._write(bytes((n,)))
+        else:
+            self._write(_VARINT_ENCODERS[(n.bit_length() + 6) // 7](n))
+
 
-    # def write_long(self, datum):
-    #     super().write_long(datum)
+def _make_varint_encoder(nbytes: int) -> Callable:
+    # Unrolled encoder of a (zig-zagged) varint that takes exactly `nbytes` bytes.
+    parts = [f"n >> {7 * i} & 0x7F | 0x80" for i in range(nbytes - 1)]
+    parts.append(f"n >> {7 * (nbytes - 1)}")
+    return eval("lambda n: bytes((" + ", ".join(parts) + ",))")  # pylint: disable=eval-used
+
+
+# Indexed by the number of output bytes; a 64-bit varint takes up to 10.
+_VARINT_ENCODERS = (None,) + tuple(_make_varint_encoder(k) for k in range(1, 11))
 
 
 class DatumWriter(avro.io.DatumWriter):
     def write(self, datum, encoder):
         # skip schema validation
-        self.write_data(self.writer_schema, datum, encoder)
+        _get_writer(self.writer_schema)(encoder, datum)
 
     def write_fixed(self, writer_schema, datum, encoder):
         if not isinstance(datum, bytes):
@@ -59,12 +113,103 @@ class DatumWriter(avro.io.DatumWriter):
         super().write_fixed(writer_schema, datum, encoder)
 
 
+# Leaf types map directly to encoder methods, called as `f(encoder, datum)`.
+_LEAF_WRITERS = {
+    "null": BinaryEncoder.write_null,
+    "boolean": BinaryEncoder.write_boolean,
+    "string": BinaryEncoder.write_utf8,
+    "int": BinaryEncoder.write_int,
+    "long": BinaryEncoder.write_long,
+    "float": BinaryEncoder.write_float,
+    "double": BinaryEncoder.write_double,
+    "bytes": BinaryEncoder.write_bytes,
+}
+
+_generic_writer = DatumWriter()
+
+
+def _compile_writer(schema) -> Callable:
+    # Build a function `f(encoder, datum)` specialized to `schema`,
+    # so that writing a datum does not dispatch on the schema type
+    # at every node of the schema tree.
+    typ = schema.type
+    if typ == "bytes" and schema.props.get("pytype") == "numpy":
+
+        def write_ndarray(encoder, datum):
+            encoder.write_bytes(datum.tobytes())
+
+        return write_ndarray
+
+    f = _LEAF_WRITERS.get(typ)
+    if f is not None:
+        return f
+
+    if typ == "record":
+        fields = [(field.name, _compile_writer(field.type)) for field in schema.fields]
+
+        def write_record(encoder, datum):
+            for name, write_field in fields:
+                write_field(encoder, datum.get(name))
+
+        return write_record
+
+    if typ == "array":
+        write_item = _compile_writer(schema.items)
+
+        def write_array(encoder, datum):
+            if len(datum) > 0:
+                encoder.write_long(len(datum))
+                for item in datum:
+                    write_item(encoder, item)
+            encoder.write_long(0)
+
+        return write_array
+
+    if typ == "fixed":
+
+        def write_fixed(encoder, datum):
+            if not isinstance(datum, bytes):
+                datum = datum.tobytes()  # works if `datum` is a Numpy object
+            encoder.write(datum)
+
+        return write_fixed
+
+    # Types not produced by `make_schema` (map, union, enum)
+    # go through the generic path.
+    def write_data(encoder, datum):
+        _generic_writer.write_data(schema, datum, encoder)
+
+    return write_data
+
+
+def _get_writer(schema) -> Callable:
+    # Schema objects are not hashable; cache the writer on the object itself.
+    try:
+        return schema._zpz_writer
+    except AttributeError:
+        f = _compile_writer(schema)
+        schema._zpz_writer = f
+        return f
+
+
+@functools.lru_cache(maxsize=256)
+def _parse(schema: str):
+    # Parsed schemas are shared between calls, hence so are
+    # the writers compiled onto them by `_get_writer`.
+    return avro.schema.Parse(schema)
+
+
+def _to_schema(schema):
+    if isinstance(schema, dict):
+        schema = _json_dumps(schema)
+    if isinstance(schema, str):
+        schema = _parse(schema)
+    return schema
+
+
 class DataFileWriter(avro.datafile.DataFileWriter):
     def __init__(self, writer, writer_schema=None, codec="null"):
-        if isinstance(writer_schema, dict):
-            writer_schema = json.dumps(writer_schema)
-        if isinstance(writer_schema, str):
-            writer_schema = avro.schema.Parse(writer_schema)
+        writer_schema = _to_schema(writer_schema)
         datum_writer = DatumWriter()
         super().__init__(writer, datum_writer, writer_schema, codec)
         self._encoder = BinaryEncoder(writer)
@@ -84,6 +229,13 @@ class BinaryDecoder(avro.io.BinaryDecoder):
 
 class DatumReader(avro.io.DatumReader):
     def read_data(self, writer_schema, reader_schema, decoder):
+        if reader_schema is writer_schema:
+            # No schema resolution needed, which is always the case
+            # when reading data written by this module.
+            return _get_reader(writer_schema)(decoder)
+        return self._read_data(writer_schema, reader_schema, decoder)
+
+    def _read_data(self, writer_schema, reader_schema, decoder):
         z = super().read_data(writer_schema, reader_schema, decoder)
         if writer_schema.props.get("pytype", None) == "numpy":
             if writer_schema.type == "long":
@@ -94,7 +246,11 @@ class DatumReader(avro.io.DatumReader):
                 z = numpy.float64(z)
             elif writer_schema.type == "float":
                 z = numpy.float32(z)
+            elif writer_schema.type == "bytes":
+                dtype = numpy.dtype(writer_schema.props["logical_type"])
+                z = numpy.frombuffer(z, dtype).copy()
             elif writer_schema.type == "array":
+                # Arrays written by earlier versions.
                 z = numpy.array(z)
             elif writer_schema.type == "fixed":
                 assert type(z) is bytes  # pylint: disable=unidiomatic-typecheck
@@ -103,10 +259,148 @@ class DatumReader(avro.io.DatumReader):
         return z
 
 
+def _read_float(decoder):
+    return numpy.float32(avro.io.BinaryDecoder.read_float(decoder))
+
+
+# Leaf types map directly to decoder methods, called as `f(decoder)`.
+# These are the functions of the base class so that they work with
+# any decoder; `float` matches the custom `BinaryDecoder` above.
+_LEAF_READERS = {
+    "null": avro.io.BinaryDecoder.read_null,
+    "boolean": avro.io.BinaryDecoder.read_boolean,
+    "string": avro.io.BinaryDecoder.read_utf8,
+    "int": avro.io.BinaryDecoder.read_int,
+    "long": avro.io.BinaryDecoder.read_long,
+    "float": _read_float,
+    "double": avro.io.BinaryDecoder.read_double,
+    "bytes": avro.io.BinaryDecoder.read_bytes,
+}
+
+_NUMPY_SCALARS = {
+    "long": numpy.int64,
+    "int": numpy.int32,
+    "double": numpy.float64,
+    "float": numpy.float32,
+}
+
+_generic_reader = DatumReader()
+
+
+def _compile_reader(schema) -> Callable:
+    # Counterpart of `_compile_writer`: build a function `f(decoder)`
+    # specialized to `schema`.
+    typ = schema.type
+    if schema.props.get("pytype") == "numpy":
+        if typ in _NUMPY_SCALARS:
+            read_value = _LEAF_READERS[typ]
+            to_numpy = _NUMPY_SCALARS[typ]
+
+            def read_scalar(decoder):
+                return to_numpy(read_value(decoder))
+
+            return read_scalar
+
+        if typ == "bytes":
+            dtype = numpy.dtype(schema.props["logical_type"])
+
+            def read_ndarray(decoder):
+                return numpy.frombuffer(decoder.read_bytes(), dtype).copy()
+
+            return read_ndarray
+
+        if typ == "fixed":
+            dtype = numpy.dtype(schema.props["logical_type"])
+            size = schema.size
+
+            def read_fixed(decoder):
+                return numpy.frombuffer(decoder.read(size), dtype)[0]
+
+            return read_fixed
+
+    f = _LEAF_READERS.get(typ)
+    if f is not None:
+        return f
+
+    if typ == "record":
+        fields = [(field.name, _compile_reader(field.type)) for field in schema.fields]
+
+        def read_record(decoder):
+            return {name: read_field(decoder) for name, read_field in fields}
+
+        return read_record
+
+    if typ == "array":
+        read_item = _compile_reader(schema.items)
+        legacy_numpy = schema.props.get("pytype") == "numpy"
+
+        def read_array(decoder):
+            items = []
+            block_count = decoder.read_long()
+            while block_count != 0:
+                if block_count < 0:
+                    block_count = -block_count
+                    decoder.read_long()  # block size in bytes
+                for _ in range(block_count):
+                    items.append(read_item(decoder))
+                block_count = decoder.read_long()
+            if legacy_numpy:
+                # Arrays written by earlier versions.
+                return numpy.array(items)
+            return items
+
+        return read_array
+
+    if typ == "fixed":
+        size = schema.size
+
+        def read_fixed_bytes(decoder):
+            return decoder.read(size)
+
+        return read_fixed_bytes
+
+    # Types not produced by `make_schema` (map, union, enum)
+    # go through the generic path.
+    def read_data(decoder):
+        return _generic_reader._read_data(schema, schema, decoder)
+
+    return read_data
+
+
+def _get_reader(schema) -> Callable:
+    try:
+        return schema._zpz_reader
+    except AttributeError:
+        f = _compile_reader(schema)
+        schema._zpz_reader = f
+        return f
+
+
+_prefetch_executor = None
+
+
+def _get_prefetch_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _prefetch_executor
+    if _prefetch_executor is None:
+        _prefetch_executor = concurrent.futures.ThreadPoolExecutor(
+            4, thread_name_prefix="avro-inflate"
+        )
+    return _prefetch_executor
+
+
 class DataFileReader(avro.datafile.DataFileReader):
-    def __init__(self, reader):  # pylint: disable=super-init-not-called
+    def __init__(self, reader, prefetch: int = 0):  # pylint: disable=super-init-not-called
         # Same as superclass, except for replacing `avro.io.BinaryDecoder`
         # by `BinaryDecoder` (the custom version above).
+        #
+        # If `prefetch` is positive and the codec is 'deflate', up to this many
+        # blocks ahead of the current one are decompressed in background threads
+        # (`zlib` releases the GIL). This helps with files of many blocks.
+
+        self._prefetch = prefetch
+        self._pending_blocks: Deque[Tuple[int, concurrent.futures.Future]] = (
+            collections.deque()
+        )  # (block_count, Future)
 
         self._reader = reader
         self._raw_decoder = BinaryDecoder(reader)
@@ -129,10 +423,35 @@ class DataFileReader(avro.datafile.DataFileReader):
 
         # get ready to read
         self._block_count = 0
-        self.datum_reader.writer_schema = avro.schema.Parse(
+        self.datum_reader.writer_schema = _parse(
             self.GetMeta(avro.datafile.SCHEMA_KEY).decode("utf-8")
         )
 
+    def __next__(self):
+        if self._prefetch <= 0 or self.codec != "deflate":
+            return super().__next__()
+
+        while self._block_count == 0:
+            while len(self._pending_blocks) <= self._prefetch:
+                if self.is_EOF() or (self._skip_sync() and self.is_EOF()):
+                    break
+                block_count = self.raw_decoder.read_long()
+                data = self.raw_decoder.read_bytes()
+                self._pending_blocks.append(
+                    (
+                        block_count,
+                        _get_prefetch_executor().submit(_zlib.decompress, data, -15),
+                    )
+                )
+            if not self._pending_blocks:
+                raise StopIteration
+            self._block_count, uncompressed = self._pending_blocks.popleft()
+            self._datum_decoder = BinaryDecoder(io.BytesIO(uncompressed.result()))
+
+        datum = self.datum_reader.read(self.datum_decoder)
+        self._block_count -= 1
+        return datum
+
     def _read_block_header(self):
         # Replace `avro_io.BinaryDecoder` in original implementation
         # by `BinaryDecoder` (our custom version above).
@@ -149,7 +468,7 @@ class DataFileReader(avro.datafile.DataFileReader):
             data = self.raw_decoder.read_bytes()
             # -15 is the log of the window size; negative indicates
             # "raw" (no zlib headers) decompression.  See zlib.h.
-            uncompressed = zlib.decompress(data, -15)
+            uncompressed = _zlib.decompress(data, -15)
             self._datum_decoder = BinaryDecoder(io.BytesIO(uncompressed))
         elif self.codec == "snappy":
             import snappy  # pylint: disable=import-outside-toplevel
@@ -166,9 +485,43 @@ class DataFileReader(avro.datafile.DataFileReader):
             raise avro.datafile.DataFileException(f"Unknown codec: {repr(self.codec)}")
 
 
+def _make_fixed_schema(x, name: str) -> dict:
+    return {
+        "name": name,
+        "type": "fixed",
+        "size": x.itemsize,
+        "pytype": "numpy",
+        "logical_type": x.dtype.name,
+    }
+
+
+# Schemas of the 'simple types', keyed by exact type so that the common
+# case costs one dict lookup rather than a series of `isinstance` checks.
+_LEAF_SCHEMAS = {
+    numpy.float32: lambda x, name: {"name": name, "type": "float", "pytype": "numpy"},
+    numpy.float64: lambda x, name: {"name": name, "type": "double", "pytype": "numpy"},
+    numpy.int32: lambda x, name: {"name": name, "type": "int", "pytype": "numpy"},
+    numpy.int64: lambda x, name: {"name": name, "type": "long", "pytype": "numpy"},
+    numpy.int8: _make_fixed_schema,
+    numpy.int16: _make_fixed_schema,
+    numpy.uint8: _make_fixed_schema,
+    numpy.uint16: _make_fixed_schema,
+    numpy.uint32: _make_fixed_schema,
+    numpy.uint64: _make_fixed_schema,
+    int: lambda x, name: {"name": name, "type": "int"},
+    float: lambda x, name: {"name": name, "type": "double"},
+    str: lambda x, name: {"name": name, "type": "string"},
+}
+
+
 def _make_schema(x, name: str) -> Union[str, dict]:
     assert isinstance(name, str)
 
+    f = _LEAF_SCHEMAS.get(type(x))
+    if f is not None:
+        return f(x, name)
+
+    # Subclasses of the simple types fall through to here.
     if isinstance(x, numpy.float32):
         return {"name": name, "type": "float", "pytype": "numpy"}
     if isinstance(x, numpy.float64):
@@ -188,21 +541,22 @@ def _make_schema(x, name: str) -> Union[str, dict]:
             numpy.uint64,
         ),
     ):
-        return {
-            "name": name,
-            "type": "fixed",
-            "size": x.itemsize,
-            "pytype": "numpy",
-            "logical_type": x.dtype.name,
-        }
+        return _make_fixed_schema(x, name)
     if isinstance(x, numpy.ndarray):
         assert len(x.shape) == 1, (
             "Multi-dimensional Numpy arrays are not supported. "
             "Please convert to a 1-D Numpy array "
             "and store it dimensionality info as another datum"
         )
-        z = _make_schema(x.dtype.type(), name + "_item")
-        return {"name": name, "type": "array", "items": z, "pytype": "numpy"}
+        _make_schema(x.dtype.type(), name + "_item")  # check `dtype` is supported
+        # Stored as the raw buffer of the array rather than as an avro array,
+        # so that it is written and read in one piece instead of element by element.
+        return {
+            "name": name,
+            "type": "bytes",
+            "pytype": "numpy",
+            "logical_type": x.dtype.str,
+        }
 
     if isinstance(x, int):
         return {"name": name, "type": "int"}
@@ -224,12 +578,20 @@ def _make_schema(x, name: str) -> Union[str, dict]:
             "empty list is not supported, " "because its type can not be inferred"
         )
         z0 = _make_schema(x[0], name + "_item")
-        if len(x) > 1:
-            for v in x[1:]:
-                z1 = _make_schema(v, name + "_item")
-                assert (
-                    z1 == z0
-                ), f"schema for x[0] ({x[0]}): {z0}; schema for x[?] ({v}): {z1}"
+        if __debug__:
+            t0 = type(x[0])
+            if t0 in _LEAF_SCHEMAS:
+                # Same exact type means same schema; no need to build them.
+                for v in x[1:]:
+                    assert (
+                        type(v) is t0
+                    ), f"type of x[0] ({x[0]}): {t0}; type of x[?] ({v}): {type(v)}"
+            else:
+                for v in x[1:]:
+                    z1 = _make_schema(v, name + "_item")
+                    assert (
+                        z1 == z0
+                    ), f"schema for x[0] ({x[0]}): {z0}; schema for x[?] ({v}): {z1}"
         if len(z0) < 3:
             items = z0["type"]
         else:
@@ -253,7 +615,7 @@ def make_schema(value, name: str, namespace: str) -> str:
         numpy.ndarray: must be 1-d, with `dtype` being one of the numpy 'simple' type.  # noqa: E501
     """
     sch = {"namespace": namespace, **_make_schema(value, name)}
-    return json.dumps(sch)
+    return _json_dumps(sch)
 
 
 # Using `DataFileWriter` instead of the barebone `DatumWriter`,
@@ -264,7 +626,7 @@ def dump_bytes(value, name: str, namespace: str) -> bytes:
     with DataFileWriter(buffer, schema) as writer:
         writer.append(value)
         writer.flush()
-        buffer.seek(0)
+        # `getvalue` does not depend on the stream position.
         return buffer.getvalue()
 
 
@@ -278,3 +640,20 @@ def load_bytes(b: bytes, return_schema=False):
             schema = reader.meta["avro.schema"].decode()
             return value, schema
         return value
+
+
+def dump_datum(value, schema) -> bytes:
+    """
+    Encode `value` without the header and block framing of `dump_bytes`.
+
+    The output does not carry its schema; the same `schema` (e.g. as
+    returned by `make_schema`) must be passed to `load_datum` to decode it.
+    """
+    buffer = io.BytesIO()
+    DatumWriter(_to_schema(schema)).write(value, BinaryEncoder(buffer))
+    return buffer.getvalue()
+
+
+def load_datum(b: bytes, schema):
+    """The inverse of `dump_datum`."""
+    return DatumReader(_to_schema(schema)).read(BinaryDecoder(io.BytesIO(b)))
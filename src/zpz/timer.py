@@ -4,23 +4,19 @@ from contextlib import contextmanager
 from functools import wraps
 from typing import Callable, List
 
+_perf_counter = time.perf_counter
+
 
 def humanize(seconds: float) -> List[str]:
+    if seconds < 60:
+        return [f"{round(seconds, 4)} seconds"]
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
     msg = []
-    if seconds >= 3600:
-        hours, seconds = divmod(seconds, 3600)
-        hours = int(hours)
-        if hours < 2:
-            msg.append(f"{hours} hour")
-        else:
-            msg.append(f"{hours} hours")
-    if seconds >= 60:
-        minutes, seconds = divmod(seconds, 60)
-        minutes = int(minutes)
-        if minutes < 2:
-            msg.append(f"{minutes} minute")
-        else:
-            msg.append(f"{minutes} minutes")
+    if hours:
+        msg.append(f"{hours} hour{'s' if hours > 1 else ''}")
+    if minutes:
+        msg.append(f"{minutes} minute{'s' if minutes > 1 else ''}")
     msg.append(f"{round(seconds, 4)} seconds")
     return msg
 
@@ -51,9 +47,9 @@ def timed(print_func: Callable = None) -> Callable:
         @wraps(func)
         def profiled_func(*args, **kwargs):
             print_func(f"Starting function `{func.__name__}`")
-            t0 = time.monotonic()
+            t0 = _perf_counter()
             result = func(*args, **kwargs)
-            duration = ", ".join(humanize(time.monotonic() - t0))
+            duration = ", ".join(humanize(_perf_counter() - t0))
             print_func(f"Finishing function `{func.__name__}`")
             print_func(f"Function `{func.__name__}` took {duration} to finish")
             return result
@@ -64,9 +60,9 @@ def timed(print_func: Callable = None) -> Callable:
 
 
 def timed_call(func, *args, **kwargs):
-    t0 = time.monotonic()
+    t0 = _perf_counter()
     z = func(*args, **kwargs)
-    seconds = time.monotonic() - t0
+    seconds = _perf_counter() - t0
     return z, seconds
 
 
@@ -80,7 +76,7 @@ def timer(msg: str):
             y = 4
             ...
     """
-    t0 = time.monotonic()
+    t0 = _perf_counter()
     yield
-    t1 = time.monotonic()
+    t1 = _perf_counter()
     print(f"{msg}: {humanize(t1 - t0)}")
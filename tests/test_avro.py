@@ -1,5 +1,15 @@
+import io
+
 import numpy as np  # type: ignore
-from zpz.avro import dump_bytes, load_bytes
+from zpz.avro import (
+    DataFileReader,
+    DataFileWriter,
+    dump_bytes,
+    dump_datum,
+    load_bytes,
+    load_datum,
+    make_schema,
+)
 
 
 def test_avro():
@@ -49,4 +59,50 @@ def test_avro():
 
     for item in data['np_arrays']:
         assert isinstance(z['np_arrays'][item], type(data['np_arrays'][item]))
+        assert z['np_arrays'][item].dtype == data['np_arrays'][item].dtype
         assert all(data['np_arrays'][item] == z['np_arrays'][item])
+
+
+def test_prefetch():
+    data = {'a': 3, 'b': 'abc', 'c': np.array([1, 2, 3], np.int32)}
+    buffer = io.BytesIO()
+    writer = DataFileWriter(buffer, make_schema(data, 'test', 'test'), codec='deflate')
+    for i in range(100):
+        writer.append({**data, 'a': i})
+        if i % 10 == 0:
+            writer.flush()  # Start a new block.
+    writer.flush()
+
+    for prefetch in (0, 3):
+        z = list(DataFileReader(io.BytesIO(buffer.getvalue()), prefetch=prefetch))
+        assert [v['a'] for v in z] == list(range(100))
+        assert all((v['c'] == data['c']).all() for v in z)
+
+
+def test_datum():
+    data = {'a': 3, 'b': 'abc', 'c': np.array([1, 2, 3], np.int32)}
+    schema = make_schema(data, 'test', 'test')
+    b = dump_datum(data, schema)
+    assert len(b) < len(dump_bytes(data, 'test', 'test'))
+    z = load_datum(b, schema)
+    assert z['a'] == 3
+    assert z['b'] == 'abc'
+    assert z['c'].dtype == np.int32
+    assert all(z['c'] == data['c'])
+
+
+def test_int_extremes():
+    # `numpy.int32` values of 2**30 or more used to hang `write_int`.
+    data = {
+        'int32_big': np.int32(2**30 + 5),
+        'int32_min': np.int32(-(2**31)),
+        'int32_max': np.int32(2**31 - 1),
+        'int_min': -(2**31),
+        'int_max': 2**31 - 1,
+        'int64_min': np.int64(-(2**63)),
+        'int64_max': np.int64(2**63 - 1),
+    }
+    z = load_bytes(dump_bytes(data, 'test', 'test'))
+    for key, value in data.items():
+        assert type(z[key]) is type(value)
+        assert z[key] == value
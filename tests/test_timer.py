@@ -2,7 +2,7 @@ import logging
 from random import randint
 from time import sleep
 
-from zpz.timer import timed
+from zpz.timer import humanize, timed
 
 logger = logging.getLogger(__name__)
 
@@ -23,3 +23,11 @@ def test_print():
 
 def test_log():
     _ = func2()
+
+
+def test_humanize():
+    assert humanize(3.5) == ['3.5 seconds']
+    assert humanize(61) == ['1 minute', '1 seconds']
+    assert humanize(3630) == ['1 hour', '30 seconds']
+    assert humanize(7322.5) == ['2 hours', '2 minutes', '2.5 seconds']
+